@@ -1,16 +1,33 @@
 import os
+import copy
 import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optimizer
-from torch.distributions import Categorical
-from torch.utils.data.sampler import BatchSampler, SubsetRandomSampler
+import torch.multiprocessing as mp
 from simple4jssp import JobEnv
 
 
+class ActorCritic(nn.Module):
+    def __init__(self, num_input, num_output, node_num=127):
+        super(ActorCritic, self).__init__()
+        # the hidden layer is shared by the policy and the value heads
+        self.fc1 = nn.Linear(num_input, node_num)
+        self.action_head = nn.Linear(node_num, num_output)
+        self.state_value = nn.Linear(node_num, 1)
+
+    def forward(self, x):
+        x = F.relu(self.fc1(x))
+        action_prob = F.softmax(self.action_head(x), dim=1)
+        value = self.state_value(x)
+        return action_prob, value
+
+
+# separate actor and critic networks, only used to load checkpoints saved before they were fused into ActorCritic
 class Actor(nn.Module):
     def __init__(self, num_input, num_output, node_num=127):
         super(Actor, self).__init__()
@@ -35,8 +52,78 @@ class Critic(nn.Module):
         return value
 
 
+class LegacyActorCritic(nn.Module):
+    # a loaded Actor and Critic pair behind the ActorCritic interface
+    def __init__(self, actor, critic):
+        super(LegacyActorCritic, self).__init__()
+        self.actor = actor
+        self.critic = critic
+
+    def forward(self, x):
+        return self.actor(x), self.critic(x)
+
+
+def sample_action(infer_net, state_buf, state_view, state):
+    # one policy step: torch.multinomial draws the action directly instead of building a Categorical
+    np.copyto(state_view[0], state)
+    with torch.inference_mode():
+        action_prob, _ = infer_net(state_buf)
+        action = torch.multinomial(action_prob, 1).item()
+        return action, action_prob[0, action].item()
+
+
+# per-process state of the rollout workers, set up once by _init_rollout_worker
+_worker_env = None
+_worker_net = None
+_worker_state_buf = None
+
+
+def _init_rollout_worker(env, net):
+    global _worker_env, _worker_net, _worker_state_buf
+    torch.set_num_threads(1)  # one core per worker
+    _worker_env = env
+    # parameters live in shared memory, so the worker always sees the latest policy
+    _worker_net = torch.jit.script(net)
+    _worker_state_buf = torch.empty(1, env.state_num)
+
+
+def _rollout_worker(seed):
+    # play one complete episode on the worker's env copy and return its transitions
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    env = _worker_env
+    state_view = _worker_state_buf.numpy()
+    # episode arrays, sized for the shortest possible episode and doubled when full
+    capacity = env.job_num * env.machine_num
+    states = np.empty((capacity, env.state_num), dtype=np.float32)
+    actions = np.empty(capacity, dtype=np.int64)
+    rewards = np.empty(capacity, dtype=np.float32)
+    probs = np.empty(capacity, dtype=np.float32)
+    t = 0
+    state = env.reset()
+    while True:
+        action, prob = sample_action(_worker_net, _worker_state_buf, state_view, state)
+        if t == len(actions):
+            states = np.concatenate((states, np.empty_like(states)))
+            actions = np.concatenate((actions, np.empty_like(actions)))
+            rewards = np.concatenate((rewards, np.empty_like(rewards)))
+            probs = np.concatenate((probs, np.empty_like(probs)))
+        states[t] = state  # stored before stepping, step_fast reuses the state buffer
+        next_state, reward, done = env.step_fast(action)
+        actions[t] = action
+        rewards[t] = reward
+        probs[t] = prob
+        t += 1
+        state = next_state
+        if done:
+            break
+    return (states[:t], actions[:t], rewards[:t], probs[:t],
+            env.current_time, env.no_op_cnt)
+
+
 class PPO:
-    def __init__(self, j_env, unit_num, memory_size, batch_size, clip_ep=0.2):
+    def __init__(self, j_env, unit_num, memory_size, batch_size, clip_ep=0.2, use_compile=True, num_workers=None,
+                 use_bf16=False):
         super(PPO, self).__init__()
         self.env = j_env
         self.memory_size = memory_size
@@ -51,140 +138,297 @@ class PPO:
         self.C_LR = 3e-3  # learning rate for critic
         self.A_UPDATE_STEPS = 10  # actor update steps
         self.max_grad_norm = 0.5
+        self.log_interval = 10  # print the result of every log_interval-th episode
+        # run the update forward pass in bfloat16 (autocast), parameters and optimizer states stay float32
+        self.use_bf16 = use_bf16
         self.training_step = 0
+        # episodes of an epoch are played by this many worker processes, 1 plays them in this process
+        if num_workers is None:
+            num_workers = min(self.memory_size, os.cpu_count() or 1)
+        self.num_workers = num_workers
 
-        self.actor_net = Actor(self.state_dim, self.action_dim, node_num=unit_num)
-        self.critic_net = Critic(self.state_dim, node_num=unit_num)
-        self.actor_optimizer = optimizer.Adam(self.actor_net.parameters(), self.A_LR)
-        self.critic_net_optimizer = optimizer.Adam(self.critic_net.parameters(), self.C_LR)
-        if not os.path.exists('param'):
-            os.makedirs('param/net_param')
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.net = ActorCritic(self.state_dim, self.action_dim, node_num=unit_num).to(self.device)
+        # episodes are played on the cpu one state at a time; on a gpu the rollout uses a cpu mirror
+        # of the network that is refreshed after every update
+        if self.device.type == 'cuda':
+            self.rollout_net = ActorCritic(self.state_dim, self.action_dim, node_num=unit_num)
+            self.rollout_net.load_state_dict(self.net.state_dict())
+        else:
+            self.rollout_net = self.net
+        self.rollout_net.share_memory()  # updated in place and read by the rollout workers
+        # TorchScript forward for the one-state calls of select_action; it shares the parameters of
+        # rollout_net, so updates are seen without re-scripting. The scripted graph is profiled per
+        # class, so it must only be run under torch.inference_mode
+        self.rollout_infer = torch.jit.script(self.rollout_net)
+        # the compiled copy is only used by update, where minibatch shapes are fixed;
+        # save/load keep working on the plain module
+        self.update_net = self.net
+        if use_compile:
+            self.update_net = torch.compile(self.net, mode="reduce-overhead", dynamic=False)
+        self._update_net_checked = self.update_net is self.net  # see update_forward
+        # the shared layer and the policy head follow the actor learning rate, the value head the critic one;
+        # parameters are updated by a single fused kernel on the gpu and by multi-tensor (foreach) ops on the cpu
+        fused = self.device.type == 'cuda'
+        self.net_optimizer = optimizer.Adam([
+            {'params': list(self.net.fc1.parameters()) + list(self.net.action_head.parameters()), 'lr': self.A_LR},
+            {'params': self.net.state_value.parameters(), 'lr': self.C_LR}], fused=fused, foreach=not fused)
+        # gradients are clipped to max_grad_norm per layer group, see update
+        self.clip_groups = [list(self.net.fc1.parameters()), list(self.net.action_head.parameters()),
+                            list(self.net.state_value.parameters())]
+        # reusable 1 x state_dim input for select_action, written through a numpy view
+        self._state_buf = torch.empty(1, self.state_dim)
+        self._np_state_view = self._state_buf.numpy()
+        # rollout buffers (state, action, discounted reward, action prob), reused across epochs
+        # and grown on demand; an episode takes at least job_num * machine_num steps
+        self._capacity = 0
+        self._bs, self._ba, self._br, self._bp = None, None, None, None
+        self._reserve(self.memory_size * self.env.job_num * self.env.machine_num)
+        os.makedirs('param/net_param', exist_ok=True)  # several instances may be trained at once
 
     def select_action(self, state):
-        state = torch.from_numpy(state).float().unsqueeze(0)
-        with torch.no_grad():
-            action_prob = self.actor_net(state)
-        c = Categorical(action_prob)
-        action = c.sample()
-        return action.item(), action_prob[:, action.item()].item()
+        return sample_action(self.rollout_infer, self._state_buf, self._np_state_view, state)
 
     def get_value(self, state):
         state = torch.tensor(state, dtype=torch.float)
-        with torch.no_grad():
-            value = self.critic_net(state)
+        with torch.inference_mode():
+            _, value = self.rollout_infer(state.view(1, -1))
         return value.item()
 
     def save_params(self):
-        torch.save(self.actor_net.state_dict(), 'param/net_param/' + self.env.case_name + 'actor_net.model')
-        torch.save(self.critic_net.state_dict(), 'param/net_param/' + self.env.case_name + 'critic_net.model')
+        torch.save(self.net.state_dict(), 'param/net_param/' + self.env.case_name + 'actor_critic_net.model')
 
     def load_params(self):
-        self.critic_net.load_state_dict(torch.load('param/net_param/' + self.env.case_name + 'critic_net.model'))
-        self.actor_net.load_state_dict(torch.load('param/net_param/' + self.env.case_name + 'actor_net.model'))
+        # returns the cpu network holding the loaded parameters: the rollout network for an actor_critic_net
+        # checkpoint, or a LegacyActorCritic for the separate actor_net/critic_net files saved before the
+        # networks were fused (those cannot be loaded into self.net, which is left untouched then)
+        prefix = 'param/net_param/' + self.env.case_name
+        if os.path.exists(prefix + 'actor_critic_net.model'):
+            self.net.load_state_dict(torch.load(prefix + 'actor_critic_net.model', map_location=self.device))
+            self.sync_rollout_net()
+            return self.rollout_net
+        actor_params = torch.load(prefix + 'actor_net.model', map_location='cpu')
+        critic_params = torch.load(prefix + 'critic_net.model', map_location='cpu')
+        node_num = actor_params['fc1.weight'].shape[0]
+        actor = Actor(self.state_dim, self.action_dim, node_num=node_num)
+        actor.load_state_dict(actor_params)
+        critic = Critic(self.state_dim, node_num=node_num)
+        critic.load_state_dict(critic_params)
+        return LegacyActorCritic(actor, critic)
 
-    def update(self, bs, ba, br, bp):
+    def sync_rollout_net(self):
+        if self.rollout_net is not self.net:
+            self.rollout_net.load_state_dict(self.net.state_dict())
+
+    def _reserve(self, capacity):
+        if capacity <= self._capacity:
+            return
+        capacity = max(capacity, 2 * self._capacity)
+        # pinned host memory lets update copy the buffers to the gpu asynchronously
+        pin = self.device.type == 'cuda'
+        bs = torch.empty(capacity, self.state_dim, dtype=torch.float32, pin_memory=pin).numpy()
+        ba = torch.empty(capacity, dtype=torch.int64, pin_memory=pin).numpy()
+        br = torch.empty(capacity, dtype=torch.float32, pin_memory=pin).numpy()
+        bp = torch.empty(capacity, dtype=torch.float32, pin_memory=pin).numpy()
+        if self._capacity > 0:
+            bs[:self._capacity] = self._bs
+            ba[:self._capacity] = self._ba
+            br[:self._capacity] = self._br
+            bp[:self._capacity] = self._bp
+        self._bs, self._ba, self._br, self._bp = bs, ba, br, bp
+        self._capacity = capacity
+
+    def discount_rewards(self, rewards):
+        # reverse cumulative discounted sum of an episode's rewards
+        rewards = np.asarray(rewards, dtype=np.float32)[::-1]
+        if self.gamma == 1:
+            discounted_r = np.cumsum(rewards)
+        else:
+            from scipy.signal import lfilter
+            discounted_r = lfilter([1.0], [1.0, -self.gamma], rewards)
+        return discounted_r[::-1].copy()
+
+    def update_forward(self, x):
+        if self._update_net_checked:
+            return self.update_net(x)
+        # torch.compile builds the network on its first call; if that fails (e.g. no working c++ toolchain
+        # for the cpu backend) the eager network is used for the rest of the run
+        try:
+            out = self.update_net(x)
+        except Exception as e:
+            print('torch.compile failed, using the eager network: {}'.format(e))
+            self.update_net = self.net
+            out = self.net(x)
+        self._update_net_checked = True
+        return out
+
+    def update(self, n):
+        # the first n transitions in the rollout buffers, no copy on the cpu
         # get old actor log prob
-        old_action_log_prob = torch.tensor(bp, dtype=torch.float).view(-1, 1)
-        state = torch.tensor(np.array(bs), dtype=torch.float)
-        action = torch.tensor(ba, dtype=torch.long).view(-1, 1)
-        d_reward = torch.tensor(br, dtype=torch.float)
+        old_action_log_prob = torch.from_numpy(self._bp[:n]).to(self.device, non_blocking=True).view(-1, 1)
+        state = torch.from_numpy(self._bs[:n]).to(self.device, non_blocking=True)
+        action = torch.from_numpy(self._ba[:n]).to(self.device, non_blocking=True).view(-1, 1)
+        d_reward = torch.from_numpy(self._br[:n]).to(self.device, non_blocking=True)
 
+        batch_num = n // self.batch_size  # the last incomplete batch is dropped
+        # indexes of all update steps, one random permutation per step drawn at once
+        perms = torch.rand(self.A_UPDATE_STEPS, n, device=self.device).argsort(dim=1)[:, :batch_num * self.batch_size]
         for i in range(self.A_UPDATE_STEPS):
-            for index in BatchSampler(SubsetRandomSampler(range(len(ba))), self.batch_size, True):
-                #  compute the advantage
-                d_reward_index = d_reward[index].view(-1, 1)
-                V = self.critic_net(state[index])
-                delta = d_reward_index - V
-                advantage = delta.detach()
-
-                # epoch iteration, PPO core!
-                action_prob = self.actor_net(state[index]).gather(1, action[index])  # new policy
-                ratio = (action_prob / old_action_log_prob[index])
-                surrogate = ratio * advantage
-                clip_loss = torch.clamp(ratio, 1 - self.epsilon, 1 + self.epsilon) * advantage
-                action_loss = -torch.min(surrogate, clip_loss).mean()
-
-                # update actor network
-                self.actor_optimizer.zero_grad()
-                action_loss.backward()
-                nn.utils.clip_grad_norm_(self.actor_net.parameters(), self.max_grad_norm)
-                self.actor_optimizer.step()
-
-                # update critic network
-                value_loss = F.mse_loss(d_reward_index, V)
-                self.critic_net_optimizer.zero_grad()
-                value_loss.backward()
-                nn.utils.clip_grad_norm_(self.critic_net.parameters(), self.max_grad_norm)
-                self.critic_net_optimizer.step()
+            # gather each buffer once per step, the minibatches are then contiguous slices
+            state_perm = state.index_select(0, perms[i])
+            d_reward_perm = d_reward.index_select(0, perms[i]).view(-1, 1)
+            action_perm = action.index_select(0, perms[i])
+            old_action_log_prob_perm = old_action_log_prob.index_select(0, perms[i])
+            for b in range(batch_num):
+                index = slice(b * self.batch_size, (b + 1) * self.batch_size)
+                with torch.autocast(device_type=self.device.type, dtype=torch.bfloat16, enabled=self.use_bf16):
+                    state_index = state_perm[index]
+                    #  compute the advantage
+                    d_reward_index = d_reward_perm[index]
+                    action_prob, V = self.update_forward(state_index)
+                    # the network runs in bfloat16, the losses are computed in float32
+                    action_prob, V = action_prob.float(), V.float()
+                    delta = d_reward_index - V
+                    advantage = delta.detach()
+
+                    # epoch iteration, PPO core!
+                    action_prob = action_prob.gather(1, action_perm[index])  # new policy
+                    ratio = (action_prob / old_action_log_prob_perm[index])
+                    surrogate = ratio * advantage
+                    clip_loss = torch.clamp(ratio, 1 - self.epsilon, 1 + self.epsilon) * advantage
+                    action_loss = -torch.min(surrogate, clip_loss).mean()
+                    value_loss = delta.pow(2).mean()  # mse of V, delta stays on the graph unlike advantage
+
+                # update actor and critic through the shared network
+                self.net_optimizer.zero_grad(set_to_none=True)
+                (action_loss + 0.5 * value_loss).backward()
+                # the policy head and the value head are clipped on their own, like the separate actor and
+                # critic were; the shared fc1 gets the gradient of both losses (the value part dominates with
+                # gamma = 1) and is clipped as a group of its own, so it does not scale down the policy head
+                for params in self.clip_groups:
+                    nn.utils.clip_grad_norm_(params, self.max_grad_norm, foreach=True)
+                self.net_optimizer.step()
                 self.training_step += 1
+        # copying back to the cpu mirror also waits for the asynchronous buffer copies above
+        self.sync_rollout_net()
 
     def test(self):
-        self.load_params()
+        net = self.load_params()
+        # parameters are fixed during the test, so they are folded into a frozen scripted copy; the networks
+        # used by select_action and train are left as they are
+        infer_net = torch.jit.freeze(torch.jit.script(copy.deepcopy(net).eval()))
         state = self.env.reset()
         while True:
-            action, _ = self.select_action(state)
+            action, _ = sample_action(infer_net, self._state_buf, self._np_state_view, state)
             next_state, reward, done = self.env.step(action)
             state = next_state
             if done:
                 break
         print(self.env.current_time)
 
+    def collect_episode(self, n):
+        # play one episode in this process, writing its transitions from row n of the rollout buffers
+        start = n
+        state = self.env.reset()
+        episode_reward = 0
+        while True:
+            action, action_prob = self.select_action(state)
+            self._reserve(n + 1)
+            self._bs[n] = state  # stored before stepping, step_fast reuses the state buffer
+            next_state, reward, done = self.env.step_fast(action)
+            self._ba[n] = action
+            self._br[n] = reward
+            self._bp[n] = action_prob
+            n += 1
+
+            state = next_state
+            episode_reward += reward
+            if done:
+                break
+        self._br[start:n] = self.discount_rewards(self._br[start:n])
+        return n, self.env.current_time, episode_reward, self.env.no_op_cnt
+
+    def store_episode(self, n, states, actions, rewards, probs):
+        # copy an episode played by a rollout worker into the rollout buffers from row n
+        end = n + len(actions)
+        self._reserve(end)
+        self._bs[n:end] = states
+        self._ba[n:end] = actions
+        self._br[n:end] = self.discount_rewards(rewards)
+        self._bp[n:end] = probs
+        return end
+
     def train(self, data_set):
         column = ["episode", "make_span", "reward", "no-op"]
-        results = pd.DataFrame(columns=column, dtype=float)
+        rows = []  # one row per episode, turned into a DataFrame once training ends
         index = 0
         converged = 0
         converged_value = []
-        t0 = time.time()
-        for i_epoch in range(2000):
-            if time.time()-t0 >= 3600:
-                break
-            bs, ba, br, bp = [], [], [], []
-            for m in range(self.memory_size):  # memory size is the number of complete episode
-                buffer_s, buffer_a, buffer_r, buffer_p = [], [], [], []
-                state = self.env.reset()
-                episode_reward = 0
-                while True:
-                    action, action_prob = self.select_action(state)
-                    next_state, reward, done = self.env.step(action)
-                    buffer_s.append(state)
-                    buffer_a.append(action)
-                    buffer_r.append(reward)
-                    buffer_p.append(action_prob)
-
-                    state = next_state
-                    episode_reward += reward
-                    if done:
-                        v_s_ = 0
-                        discounted_r = []
-                        for r in buffer_r[::-1]:
-                            v_s_ = r + self.gamma * v_s_
-                            discounted_r.append(v_s_)
-                        discounted_r.reverse()
-
-                        bs[len(bs):len(bs)] = buffer_s
-                        ba[len(ba):len(ba)] = buffer_a
-                        br[len(br):len(br)] = discounted_r
-                        bp[len(bp):len(bp)] = buffer_p
-                        # Episode: make_span: Episode reward
-                        print('{}    {}    {:.2f}  {}'.format(i_epoch, self.env.current_time, episode_reward,
-                                                              self.env.no_op_cnt))
-                        index = i_epoch * self.memory_size + m
-                        results.loc[index] = [i_epoch, self.env.current_time, episode_reward, self.env.no_op_cnt]
-                        converged_value.append(self.env.current_time)
-                        if len(converged_value) >= 31:
-                            converged_value.pop(0)
-                        break
-            self.update(bs, ba, br, bp)
-            converged = index
-            if min(converged_value) == max(converged_value) and len(converged_value) >= 30:
+        no_op_cnt = 0
+        pool = None
+        if self.num_workers > 1:
+            pool = mp.Pool(self.num_workers, initializer=_init_rollout_worker, initargs=(self.env, self.rollout_net))
+        try:
+            t0 = time.time()
+            for i_epoch in range(2000):
+                if time.time()-t0 >= 3600:
+                    break
+                n = 0
+                if pool is not None:
+                    seeds = torch.randint(2 ** 31 - 1, (self.memory_size,)).tolist()
+                    episodes = pool.map(_rollout_worker, seeds)
+                for m in range(self.memory_size):  # memory size is the number of complete episode
+                    if pool is None:
+                        n, make_span, episode_reward, no_op_cnt = self.collect_episode(n)
+                    else:
+                        states, actions, rewards, probs, make_span, no_op_cnt = episodes[m]
+                        n = self.store_episode(n, states, actions, rewards, probs)
+                        episode_reward = rewards.sum()
+                    index = i_epoch * self.memory_size + m
+                    if index % self.log_interval == 0:
+                        # case: Episode: make_span: Episode reward
+                        print('{}  {}    {}    {:.2f}  {}'.format(self.case_name, i_epoch, make_span, episode_reward,
+                                                                 no_op_cnt))
+                    rows.append((i_epoch, make_span, episode_reward, no_op_cnt))
+                    converged_value.append(make_span)
+                    if len(converged_value) >= 31:
+                        converged_value.pop(0)
+                self.update(n)
                 converged = index
-                break
-        if not os.path.exists('results'):
-            os.makedirs('results')
+                if min(converged_value) == max(converged_value) and len(converged_value) >= 30:
+                    converged = index
+                    break
+        finally:
+            # also reached when update raises or the run is interrupted, so no worker is left behind
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+                # the episodes were played on the workers' env copies, leave this env in a defined
+                # (freshly reset) state instead of the one before training
+                self.env.reset()
+        os.makedirs('results', exist_ok=True)
+        results = pd.DataFrame(rows, columns=column, dtype=float)
         results.to_csv("results/" + str(self.env.case_name) + "_" + data_set + ".csv")
         self.save_params()
-        return min(converged_value), converged, time.time()-t0, self.env.no_op_cnt
+        return min(converged_value), converged, time.time()-t0, no_op_cnt
+
+
+def _init_train_worker(cores):
+    # one core and one intra-op thread per training process to avoid oversubscription
+    core = cores.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {core})
+    torch.set_num_threads(1)
+
+
+def _train_one(file_name, path, parameters):
+    print(file_name + "========================")
+    title = file_name.split('.')[0]
+    env = JobEnv(title, path, no_op=False)
+    scale = env.job_num * env.machine_num
+    # instances already run in parallel, so each one plays its episodes in-process
+    model = PPO(env, unit_num=env.state_num, memory_size=3, batch_size=scale, clip_ep=0.2, num_workers=1)
+    return title, model.train(parameters)
 
 
 if __name__ == '__main__':
@@ -195,12 +439,19 @@ if __name__ == '__main__':
     param = [parameters, "converge_cnt", "total_time", "no-op"]
 
     simple_results = pd.DataFrame(columns=param, dtype=int)
-    for file_name in os.listdir(path):
-        print(file_name + "========================")
-        title = file_name.split('.')[0]
-        env = JobEnv(title, path, no_op=False)
-        scale = env.job_num * env.machine_num
-        model = PPO(env, unit_num=env.state_num, memory_size=3, batch_size=scale, clip_ep=0.2)
-        simple_results.loc[title] = model.train(parameters)
+    # the instances are independent, train them in parallel on separate cores
+    if hasattr(os, 'sched_getaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    max_workers = max(1, len(cores) // 2)
+    free_cores = mp.Queue()
+    for core in cores[:max_workers]:
+        free_cores.put(core)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_train_worker,
+                             initargs=(free_cores,)) as executor:
+        futures = [executor.submit(_train_one, file_name, path, parameters) for file_name in os.listdir(path)]
+        for future in futures:  # in submission order, so the rows follow os.listdir like before
+            title, result = future.result()
+            simple_results.loc[title] = result
     simple_results.to_csv(parameters + ".csv")
-
@@ -3,6 +3,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import random
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, without it the kernels below run as plain python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 
 def get_optimal(job_dict, opt_sign):
     if opt_sign == "max":
@@ -20,10 +28,144 @@ def get_optimal(job_dict, opt_sign):
             i += 1
 
 
+# kernels of the env transition on the integer state arrays, compiled by numba when available
+@njit(cache=True)
+def _job_feature(job, job_id, op, last_release_time, current_time, rule):
+    # feature of PDR rule (index into JobEnv.pdr_label) for a job whose current operation is op
+    machine_num = job.shape[1] // 2
+    if rule == 0:  # SPT
+        return float(job[job_id, op * 2 + 1])
+    elif rule == 1 or rule == 4:  # MWKR, LRM (without the current operation)
+        work_remain = 0
+        for i in range(op + 1 if rule == 4 else op, machine_num):
+            work_remain += job[job_id, i * 2 + 1]
+        return float(work_remain)
+    elif rule == 2:  # FDD/MWKR
+        work_remain = 0
+        work_done = 0
+        for i in range(op, machine_num):
+            work_remain += job[job_id, i * 2 + 1]
+        for k in range(op):
+            work_done += job[job_id, k * 2 + 1]
+        if work_remain == 0:
+            return 10000.0
+        return work_done / work_remain
+    elif rule == 3:  # MOPNR
+        return float(machine_num - op + 1)
+    elif rule == 5:  # FIFO
+        return float(current_time - last_release_time[job_id])
+    return 0.0
+
+
+@njit(cache=True)
+def _dispatch_job(job, current_op_of_job, assignable_job, job_on_machine, last_release_time, current_time, rule,
+                  maximize):
+    # returns the first job (by id) whose feature of PDR rule is optimal and whose machine is idle, -1 if none
+    job_num = job.shape[0]
+    features = np.zeros(job_num)
+    found = False
+    best = 0.0
+    for j in range(job_num):
+        if not assignable_job[j]:
+            continue
+        features[j] = _job_feature(job, j, current_op_of_job[j], last_release_time, current_time, rule)
+        if not found or (maximize and features[j] > best) or (not maximize and features[j] < best):
+            best = features[j]
+            found = True
+    for j in range(job_num):
+        if assignable_job[j] and features[j] == best and job_on_machine[job[j, current_op_of_job[j] * 2]] < 0:
+            return j
+    return -1
+
+
+@njit(cache=True)
+def _find_second_min(next_time_on_machine):
+    min_time = next_time_on_machine.min()
+    second_min_value = 100000
+    for value in next_time_on_machine:
+        if min_time < value < second_min_value:
+            second_min_value = value
+    if second_min_value == 100000:
+        return min_time
+    return second_min_value
+
+
+@njit(cache=True)
+def _time_advance(next_time_on_machine, current_time):
+    hole_len = 0
+    min_next_time = next_time_on_machine.min()
+    if current_time < min_next_time:
+        current_time = min_next_time
+    else:
+        current_time = _find_second_min(next_time_on_machine)
+    for machine in range(next_time_on_machine.shape[0]):
+        dist_need_to_advance = current_time - next_time_on_machine[machine]
+        if dist_need_to_advance > 0:
+            next_time_on_machine[machine] += dist_need_to_advance
+            hole_len += dist_need_to_advance
+    return current_time, hole_len
+
+
+@njit(cache=True)
+def _release_machine(job, job_on_machine, next_time_on_machine, current_op_of_job, assignable_job, finished_jobs,
+                     last_release_time, current_time):
+    job_num = job.shape[0]
+    machine_num = job.shape[1] // 2
+    for k in range(machine_num):
+        cur_job_id = job_on_machine[k]
+        if cur_job_id >= 0 and current_time >= next_time_on_machine[k]:
+            job_on_machine[k] = -1
+            last_release_time[cur_job_id] = current_time
+            for x in range(job_num):  # release jobs on this machine
+                if not finished_jobs[x] and job[x, current_op_of_job[x] * 2] == k:
+                    assignable_job[x] = True
+            current_op_of_job[cur_job_id] += 1
+            if current_op_of_job[cur_job_id] >= machine_num:
+                finished_jobs[cur_job_id] = True
+                assignable_job[cur_job_id] = False
+            else:
+                next_machine = job[cur_job_id, current_op_of_job[cur_job_id] * 2]
+                if job_on_machine[next_machine] >= 0:  # 如果下一工序的机器被占用，则作业不可分配
+                    assignable_job[cur_job_id] = False
+
+
+@njit(cache=True)
+def _allocate_job(job, job_id, job_on_machine, next_time_on_machine, current_op_of_job, assignable_job,
+                  finished_jobs, last_release_time, current_time):
+    # returns the start time of the operation, the new current time and the idle time advanced over
+    job_num = job.shape[0]
+    machine_num = job.shape[1] // 2
+    stage = current_op_of_job[job_id]
+    machine_id = job[job_id, stage * 2]
+    process_time = job[job_id, stage * 2 + 1]
+
+    job_on_machine[machine_id] = job_id
+    start_time = next_time_on_machine[machine_id]
+    next_time_on_machine[machine_id] += process_time
+
+    last_release_time[job_id] = current_time
+    assignable_job[job_id] = False
+    # assignable jobs whose current machine are employed will not be assignable
+    for x in range(job_num):
+        if assignable_job[x] and job[x, current_op_of_job[x] * 2] == machine_id:
+            assignable_job[x] = False
+    # there is no assignable jobs after assigned a job and time advance is needed
+    hole_len = 0
+    while not assignable_job.any() and current_op_of_job.sum() < machine_num * job_num:
+        current_time, advanced = _time_advance(next_time_on_machine, current_time)
+        hole_len += advanced
+        _release_machine(job, job_on_machine, next_time_on_machine, current_op_of_job, assignable_job,
+                         finished_jobs, last_release_time, current_time)
+    return start_time, current_time, hole_len
+
+
 class JobEnv:
     def __init__(self, case_name, path='../all_data_set/', no_op=False):
         self.PDRs = {"SPT": "min", "MWKR": "max", "FDD/MWKR": "min", "MOPNR": "max", "LRM": "max", "FIFO": "max"}
         self.pdr_label = ["SPT", "MWKR", "FDD/MWKR", "MOPNR", "LRM", "FIFO"]
+        for label in self.pdr_label:
+            if self.PDRs.get(label) not in ("min", "max", "random"):
+                raise ValueError("unsupported selection {!r} for PDR {}".format(self.PDRs.get(label), label))
         self.case_name = case_name
         file = path + case_name + ".txt"
         with open(file, 'r') as f:
@@ -92,35 +234,16 @@ class JobEnv:
         return self._get_state()
 
     def get_feature(self, job_id, feature):
-        if feature == self.pdr_label[0]:
-            return self.job[job_id][self.current_op_of_job[job_id] * 2 + 1]
-        elif feature == self.pdr_label[1]:
-            work_remain = 0
-            for i in range(self.machine_num-self.current_op_of_job[job_id]):
-                work_remain += self.job[job_id][(i + self.current_op_of_job[job_id])*2+1]
-            return work_remain
-        elif feature == self.pdr_label[2]:
-            work_remain = 0
-            work_done = 0
-            for i in range(self.machine_num - self.current_op_of_job[job_id]):
-                work_remain += self.job[job_id][(i + self.current_op_of_job[job_id]) * 2 + 1]
-            for k in range(self.current_op_of_job[job_id]):
-                work_done += self.job[job_id][k * 2 + 1]
-            if work_remain == 0:
-                return 10000
-            return work_done/work_remain
-        elif feature == self.pdr_label[3]:
-            return self.machine_num - self.current_op_of_job[job_id] + 1
-        elif feature == self.pdr_label[4]:
-            work_remain = 0
-            for i in range(self.machine_num - self.current_op_of_job[job_id] - 1):
-                work_remain += self.job[job_id][(i + self.current_op_of_job[job_id] + 1) * 2 + 1]
-            return work_remain
-        elif feature == self.pdr_label[5]:
-            return self.current_time - self.last_release_time[job_id]
-        return 0
+        if feature not in self.pdr_label:
+            return 0
+        return _job_feature(self.job, job_id, self.current_op_of_job[job_id], self.last_release_time,
+                            self.current_time, self.pdr_label.index(feature))
 
     def _get_state(self):
+        self._fill_state()
+        return self.state.copy()
+
+    def _fill_state(self):
         # self.state = []
         # self.state = np.append(self.state, (self.next_time_on_machine - self.current_time) / self.max_op_len)
         # self.state = np.append(self.state, self.job_on_machine / self.job_num)
@@ -131,9 +254,13 @@ class JobEnv:
         self.state[self.machine_num:self.machine_num*2] = np.array(self.job_on_machine) / self.job_num
         self.state[self.machine_num * 2:self.machine_num * 2 + self.job_num] = self.current_op_of_job/self.machine_num
         self.state[self.machine_num * 2 + self.job_num:] = self.assignable_job
-        return self.state.flatten()
 
     def step(self, action):
+        state, reward, done = self.step_fast(action)
+        return state.copy(), reward, done
+
+    def step_fast(self, action):
+        # same as step, but the returned state is the env's own buffer and is overwritten by the next step
         self.done = False
         self.reward = 0
         if action == len(self.pdr_label):
@@ -141,93 +268,56 @@ class JobEnv:
             self.reward -= self.time_advance()
             self.release_machine()
         else:
-            # action is PDR
+            # action is PDR, allocate one job according to it
             PDR = [self.pdr_label[action], self.PDRs.get(self.pdr_label[action])]
-            # allocate jobs according to PDRs
-            job_dict = {}
-            for i in range(self.job_num):
-                if self.assignable_job[i]:
-                    job_dict[i] = self.get_feature(i, PDR[0])
-            if len(job_dict) > 0:
+            if PDR[1] == "random":
+                # random selection keeps the python path, which draws from np.random for every candidate job
+                job_dict = {}
+                for i in range(self.job_num):
+                    if self.assignable_job[i]:
+                        job_dict[i] = self.get_feature(i, PDR[0])
+                job_id = -1
                 for key in job_dict.keys():
                     machine_id = self.job[key][self.current_op_of_job[key] * 2]
                     if job_dict.get(key) == get_optimal(job_dict, PDR[1]) and self.job_on_machine[machine_id] < 0:
-                        self.allocate_job(key)
+                        job_id = key
                         break  # one step at one time
+            else:
+                job_id = _dispatch_job(self.job, self.current_op_of_job, self.assignable_job, self.job_on_machine,
+                                       self.last_release_time, self.current_time, action, PDR[1] == "max")
+            if job_id >= 0:
+                self.allocate_job(job_id)
 
         if self.stop():
             self.done = True
-        return self._get_state(), self.reward/self.max_op_len, self.done
+        self._fill_state()
+        return self.state, self.reward/self.max_op_len, self.done
 
     def allocate_job(self, job_id):
         stage = self.current_op_of_job[job_id]
         machine_id = self.job[job_id][stage * 2]
         process_time = self.job[job_id][stage * 2 + 1]
-
-        self.job_on_machine[machine_id] = job_id
-        start_time = self.next_time_on_machine[machine_id]
-        self.next_time_on_machine[machine_id] += process_time
-        end_time = start_time + process_time
-        self.result_dict[job_id + 1, machine_id + 1] = start_time, end_time, process_time
-
-        self.last_release_time[job_id] = self.current_time
-        self.assignable_job[job_id] = False
-        # assignable jobs whose current machine are employed will not be assignable
-        for x in range(self.job_num):
-            if self.assignable_job[x] and self.job[x][self.current_op_of_job[x] * 2] == machine_id:
-                self.assignable_job[x] = False
-        # there is no assignable jobs after assigned a job and time advance is needed
-        self.reward += process_time
-        while sum(self.assignable_job) == 0 and not self.stop():
-            self.reward -= self.time_advance()
-            self.release_machine()
+        start_time, self.current_time, hole_len = _allocate_job(
+            self.job, job_id, self.job_on_machine, self.next_time_on_machine, self.current_op_of_job,
+            self.assignable_job, self.finished_jobs, self.last_release_time, self.current_time)
+        self.result_dict[job_id + 1, machine_id + 1] = start_time, start_time + process_time, process_time
+        self.reward += process_time - hole_len
 
     def time_advance(self):
-        hole_len = 0
-        min_next_time = min(self.next_time_on_machine)
-        if self.current_time < min_next_time:
-            self.current_time = min_next_time
-        else:
-            self.current_time = self.find_second_min()
-        for machine in range(self.machine_num):
-            dist_need_to_advance = self.current_time - self.next_time_on_machine[machine]
-            if dist_need_to_advance > 0:
-                self.next_time_on_machine[machine] += dist_need_to_advance
-                hole_len += dist_need_to_advance
+        self.current_time, hole_len = _time_advance(self.next_time_on_machine, self.current_time)
         return hole_len
 
     def release_machine(self):
-        for k in range(self.machine_num):
-            cur_job_id = self.job_on_machine[k]
-            if cur_job_id >= 0 and self.current_time >= self.next_time_on_machine[k]:
-                self.job_on_machine[k] = -1
-                self.last_release_time[cur_job_id] = self.current_time
-                for x in range(self.job_num):  # release jobs on this machine
-                    if not self.finished_jobs[x] and self.job[x][self.current_op_of_job[x] * 2] == k:
-                        self.assignable_job[x] = True
-                self.current_op_of_job[cur_job_id] += 1
-                if self.current_op_of_job[cur_job_id] >= self.machine_num:
-                    self.finished_jobs[cur_job_id] = True
-                    self.assignable_job[cur_job_id] = False
-                else:
-                    next_machine = self.job[cur_job_id][self.current_op_of_job[cur_job_id] * 2]
-                    if self.job_on_machine[next_machine] >= 0:  # 如果下一工序的机器被占用，则作业不可分配
-                        self.assignable_job[cur_job_id] = False
+        _release_machine(self.job, self.job_on_machine, self.next_time_on_machine, self.current_op_of_job,
+                         self.assignable_job, self.finished_jobs, self.last_release_time, self.current_time)
 
     def stop(self):
-        if sum(self.current_op_of_job) < self.machine_num * self.job_num:
+        if self.current_op_of_job.sum() < self.machine_num * self.job_num:
             return False
         return True
 
     def find_second_min(self):
-        min_time = min(self.next_time_on_machine)
-        second_min_value = 100000
-        for value in self.next_time_on_machine:
-            if min_time < value < second_min_value:
-                second_min_value = value
-        if second_min_value == 100000:
-            return min_time
-        return second_min_value
+        return _find_second_min(self.next_time_on_machine)
 
     def draw_gantt(self, file_name):
         font_dict = {